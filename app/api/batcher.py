@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional
+from starlette.concurrency import run_in_threadpool
+
+from app.models.schemas import SentimentResult
+
+logger = logging.getLogger(__name__)
+
+# Максимальный размер пакета и время ожидания его наполнения
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 5
+
+
+class DynamicBatcher:
+    """
+    Объединение одновременных запросов на классификацию одного текста
+    в один вызов predict_batch
+    """
+    def __init__(
+        self,
+        predict_batch: Callable[[List[str]], List[SentimentResult]],
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS
+    ):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Запуск фонового обработчика очереди"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановка фонового обработчика очереди"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, text: str) -> SentimentResult:
+        """Постановка текста в очередь и ожидание результата классификации"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> list:
+        """Сбор пакета: до max_batch_size элементов или до истечения max_wait"""
+        loop = asyncio.get_running_loop()
+        items = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(items) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            try:
+                results = await run_in_threadpool(self.predict_batch, [text for text, _ in items])
+            except Exception as e:
+                logger.error(f"Ошибка при пакетной классификации в очереди: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
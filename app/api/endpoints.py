@@ -1,29 +1,139 @@
-import time
+import os
+from time import perf_counter_ns
+import gzip
+import asyncio
+import hashlib
 import logging
-from typing import List
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import HTMLResponse
+import functools
+import multiprocessing
+from email.utils import formatdate
+import orjson
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import chain
+from pathlib import Path
+from typing import Final, List, Optional
+from cachetools import LRUCache
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request
+from fastapi.responses import FileResponse, HTMLResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 
 from app.models.schemas import (
     SingleReviewRequest,
     BatchReviewRequest,
     BatchReviewResponse,
     SentimentResult,
+    SentimentLabel,
     ModelInfo,
     ErrorResponse,
     FileUploadResponse
 )
 from app.models.mock_classifier import mock_classifier as classifier
+from app.api.batcher import DynamicBatcher
 from app.utils.file_handler import FileHandler
-from app.auth.dependencies import get_current_active_user
+from app.auth.dependencies import get_current_active_user, get_current_admin_user
 from app.db.models import User
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Кэш результатов классификации по хешу текста
+_pred_cache: LRUCache = LRUCache(maxsize=settings.prediction_cache_size)
+_cache_stats = {"hits": 0, "misses": 0}
 
-@router.post("/classify", response_model=SentimentResult)
+# Объединение одиночных запросов /classify в пакеты
+batcher = DynamicBatcher(classifier.predict_batch)
+
+# Модель загружается в фоне, пока приложение уже принимает запросы
+_model_ready = False
+
+
+def warmup_model():
+    """Загрузка модели при запуске приложения (выполняется в отдельном потоке)"""
+    global _model_ready
+    classifier.load_model()
+    _model_ready = True
+
+
+async def require_model_ready():
+    """Отказ в классификации с кодом 503, пока модель не загружена"""
+    if not _model_ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Модель загружается, повторите запрос позже",
+            headers={"Retry-After": "1"}
+        )
+
+
+def _cache_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _cache_store(key: bytes, result: SentimentResult):
+    # Нулевая уверенность означает ошибку модели - такие результаты не кэшируем
+    if result.confidence > 0:
+        _pred_cache[key] = result
+
+
+# Тексты короче этой длины (без пробелов) не отправляются в модель. Проверка включается
+# значением MIN_TEXT_LENGTH >= 2: пустые тексты отклоняются схемами запросов (422) и
+# отбрасываются парсерами файлов, а одного символа (иероглифа, эмодзи) бывает достаточно
+# для определения тональности
+MIN_TEXT_LENGTH = settings.min_text_length
+_SKIP_SHORT_TEXTS = MIN_TEXT_LENGTH > 1
+
+
+def _trivial(text: str) -> Optional[SentimentResult]:
+    """
+    Нейтральный результат для слишком коротких текстов без вызова модели
+    """
+    if _SKIP_SHORT_TEXTS and len(text.strip()) < MIN_TEXT_LENGTH:
+        return SentimentResult(text=text, sentiment=SentimentLabel.NEUTRAL, confidence=0.0)
+    return None
+
+
+def _result_to_dict(result: SentimentResult) -> dict:
+    # Результаты классификатора уже провалидированы, повторная проверка схемой ответа не нужна
+    return {"text": result.text, "sentiment": result.sentiment, "confidence": result.confidence}
+
+
+async def _predict_batch_cached(texts: List[str]) -> List[SentimentResult]:
+    """
+    Пакетная классификация с использованием кэша: модель вызывается только
+    для промахов кэша и нетривиальных текстов
+    """
+    results: List[SentimentResult] = [None] * len(texts)
+    miss_indices, miss_keys, miss_texts = [], [], []
+    hits = 0
+    for i, text in enumerate(texts):
+        trivial = _trivial(text)
+        if trivial is not None:
+            results[i] = trivial
+            continue
+        key = _cache_key(text)
+        cached = _pred_cache.get(key)
+        if cached is None:
+            miss_indices.append(i)
+            miss_keys.append(key)
+            miss_texts.append(text)
+        else:
+            results[i] = cached
+            hits += 1
+
+    _cache_stats["hits"] += hits
+    _cache_stats["misses"] += len(miss_texts)
+
+    if miss_texts:
+        predicted = await run_in_threadpool(classifier.predict_batch, miss_texts)
+        for i, key, result in zip(miss_indices, miss_keys, predicted):
+            _cache_store(key, result)
+            results[i] = result
+    return results
+
+
+@router.post("/classify", response_model=SentimentResult, dependencies=[Depends(require_model_ready)])
 async def classify_review(
     request: SingleReviewRequest,
     current_user: User = Depends(get_current_active_user)
@@ -32,14 +142,29 @@ async def classify_review(
     Классификация одного отзыва
     """
     try:
-        result = classifier.predict_single(request.text)
+        result = _trivial(request.text)
+        if result is not None:
+            return result
+        key = _cache_key(request.text)
+        result = _pred_cache.get(key)
+        if result is not None:
+            _cache_stats["hits"] += 1
+            return result
+        _cache_stats["misses"] += 1
+        result = await batcher.submit(request.text)
+        _cache_store(key, result)
         return result
     except Exception as e:
         logger.error(f"Ошибка при классификации отзыва: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.post("/classify-batch", response_model=BatchReviewResponse)
+@router.post(
+    "/classify-batch",
+    response_model=None,
+    dependencies=[Depends(require_model_ready)],
+    responses={200: {"model": BatchReviewResponse}}
+)
 async def classify_reviews_batch(
     request: BatchReviewRequest,
     current_user: User = Depends(get_current_active_user)
@@ -48,28 +173,171 @@ async def classify_reviews_batch(
     Пакетная классификация отзывов
     """
     try:
-        start_time = time.time()
-        results = classifier.predict_batch(request.texts)
-        processing_time = time.time() - start_time
-        
-        # Подсчет статистики
-        positive_count = sum(1 for r in results if r.sentiment == "positive")
-        negative_count = sum(1 for r in results if r.sentiment == "negative")
-        neutral_count = sum(1 for r in results if r.sentiment == "neutral")
+        start_time = perf_counter_ns()
+        results = await _predict_batch_cached(request.texts)
+        processing_time = (perf_counter_ns() - start_time) / 1e9
         
-        return BatchReviewResponse(
-            results=results,
-            total=len(results),
-            positive_count=positive_count,
-            negative_count=negative_count,
-            neutral_count=neutral_count
-        )
+        # Подсчет статистики за один проход
+        counts = dict.fromkeys(SentimentLabel, 0)
+        for r in results:
+            counts[r.sentiment] += 1
+
+        # Ответ сериализуется напрямую через orjson, минуя проверку схемой ответа
+        content = orjson.dumps({
+            "results": [_result_to_dict(r) for r in results],
+            "total": len(results),
+            "positive_count": counts[SentimentLabel.POSITIVE],
+            "negative_count": counts[SentimentLabel.NEGATIVE],
+            "neutral_count": counts[SentimentLabel.NEUTRAL]
+        })
+        return Response(content=content, media_type="application/json")
     except Exception as e:
         logger.error(f"Ошибка при пакетной классификации отзывов: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.post("/upload-file", response_model=FileUploadResponse)
+STREAM_CHUNK_SIZE = 64
+
+
+@router.post("/classify-batch-stream", dependencies=[Depends(require_model_ready)])
+async def classify_reviews_batch_stream(
+    request: BatchReviewRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Пакетная классификация отзывов с потоковой выдачей результатов в формате NDJSON
+    """
+    async def generate():
+        texts = request.texts
+        for start in range(0, len(texts), STREAM_CHUNK_SIZE):
+            try:
+                results = await _predict_batch_cached(texts[start:start + STREAM_CHUNK_SIZE])
+            except Exception as e:
+                logger.error(f"Ошибка при потоковой классификации отзывов: {e}")
+                # Статус 200 уже отправлен, поэтому обрыв потока обозначается последней строкой
+                yield orjson.dumps({"error": "Внутренняя ошибка сервера"}) + b"\n"
+                return
+            for r in results:
+                yield orjson.dumps(_result_to_dict(r)) + b"\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Ограничение числа одновременно обрабатываемых загрузок
+_UPLOAD_SEM = asyncio.Semaphore(settings.upload_concurrency)
+
+
+# Парсеры файлов по расширению
+_PARSERS = {
+    "csv": FileHandler.process_csv_texts,
+    "json": FileHandler.process_json_file,
+    "txt": FileHandler.process_txt_file,
+}
+_ALLOWED_EXT = frozenset(_PARSERS)
+_ALLOWED_EXT_MSG = ", ".join(_PARSERS)
+
+# Разбор CSV упирается в GIL, поэтому выполняется в пуле процессов,
+# остальные форматы - в пуле потоков
+_PROCESS_POOL_EXTENSIONS = {"csv"}
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+# Одновременно разбирается не больше upload_concurrency файлов, поэтому больше процессов не нужно
+_PROCESS_POOL_WORKERS = min(settings.upload_concurrency, os.cpu_count() or 1)
+# Процессы запускаются через forkserver (spawn, где он недоступен), а не fork:
+# fork многопоточного сервера может привести к взаимоблокировке в дочернем процессе
+_PROCESS_POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def start_process_pool() -> ProcessPoolExecutor:
+    """Создание пула процессов для разбора файлов"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=_PROCESS_POOL_WORKERS,
+            mp_context=_PROCESS_POOL_CONTEXT
+        )
+    return _process_pool
+
+
+def shutdown_process_pool():
+    """Остановка пула процессов для разбора файлов"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def _parse_file(file_extension: str, file_content: bytes) -> List[str]:
+    parser = _PARSERS[file_extension]
+    if file_extension in _PROCESS_POOL_EXTENSIONS:
+        loop = asyncio.get_running_loop()
+        pool = start_process_pool()
+        try:
+            return await loop.run_in_executor(pool, parser, file_content)
+        except BrokenProcessPool:
+            # Рабочий процесс аварийно завершился: пул пересоздается, разбор повторяется один раз.
+            # Пул, уже пересозданный параллельным запросом, не останавливается
+            logger.warning("Пул процессов для разбора файлов поврежден, создается новый")
+            if _process_pool is pool:
+                shutdown_process_pool()
+            return await loop.run_in_executor(start_process_pool(), parser, file_content)
+    return await run_in_threadpool(parser, file_content)
+
+
+# Размер части текстов из файла, классифицируемой отдельным вызовом модели
+UPLOAD_PREDICT_CHUNK_SIZE = 256
+
+# Ограничение числа одновременных вызовов модели для частей загруженных файлов
+_INFER_SEM = asyncio.Semaphore(settings.infer_concurrency)
+
+
+async def _predict_chunk(texts: List[str]) -> List[SentimentResult]:
+    async with _INFER_SEM:
+        return await run_in_threadpool(classifier.predict_batch, texts)
+
+
+async def _predict_chunks(texts: List[str]) -> List[SentimentResult]:
+    """
+    Параллельная классификация текстов из файла частями в пуле потоков
+    """
+    chunks = [
+        texts[start:start + UPLOAD_PREDICT_CHUNK_SIZE]
+        for start in range(0, len(texts), UPLOAD_PREDICT_CHUNK_SIZE)
+    ]
+    chunk_results = await asyncio.gather(
+        *[_predict_chunk(chunk) for chunk in chunks]
+    )
+    return list(chain.from_iterable(chunk_results))
+
+
+async def _read_capped(file: UploadFile, limit: int) -> bytes:
+    """
+    Чтение загруженного файла частями с прерыванием при превышении лимита
+    """
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > limit:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Размер файла превышает максимально допустимый ({FileHandler.MAX_FILE_SIZE_MB} МБ)"
+            )
+    return bytes(buffer)
+
+
+@router.post(
+    "/upload-file",
+    response_model=None,
+    dependencies=[Depends(require_model_ready)],
+    responses={200: {"model": FileUploadResponse}}
+)
 async def upload_file(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_active_user)
@@ -78,648 +346,165 @@ async def upload_file(
     Загрузка файла с отзывами для классификации
     Поддерживаемые форматы: CSV, JSON, TXT
     """
-    try:
-        # Проверка формата файла
-        allowed_extensions = ["csv", "json", "txt"]
-        file_extension = file.filename.split(".")[-1].lower() if file.filename else ""
-        
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Неподдерживаемый формат файла. Разрешены: {', '.join(allowed_extensions)}"
-            )
-        
-        # Чтение содержимого файла
-        file_content = await file.read()
-        
-        # Проверка размера файла
-        if not FileHandler.validate_file_size(file_content):
-            raise HTTPException(
-                status_code=400,
-                detail="Размер файла превышает максимально допустимый (10 МБ)"
-            )
-        
-        # Обработка файла в зависимости от формата
-        start_time = time.time()
-        
-        if file_extension == "csv":
-            texts, column_name = FileHandler.process_csv_file(file_content)
-        elif file_extension == "json":
-            texts = FileHandler.process_json_file(file_content)
-        else:  # txt
-            texts = FileHandler.process_txt_file(file_content)
-        
-        if not texts:
-            raise HTTPException(
-                status_code=400,
-                detail="В файле не найдено текстов для анализа"
-            )
-        
-        # Классификация текстов
-        results = classifier.predict_batch(texts)
-        processing_time = time.time() - start_time
-        
-        return FileUploadResponse(
-            filename=file.filename,
-            size=len(file_content),
-            results=results,
-            total_processed=len(results),
-            processing_time=round(processing_time, 2)
+    # При исчерпании лимита одновременных загрузок сразу отвечаем 503 вместо ожидания
+    if _UPLOAD_SEM.locked():
+        raise HTTPException(
+            status_code=503,
+            detail="Сервер занят обработкой других файлов, повторите запрос позже",
+            headers={"Retry-After": "1"}
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка при обработке файла: {e}")
-        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
-
-
-@router.get("/model-info", response_model=ModelInfo)
+    
+    async with _UPLOAD_SEM:
+        try:
+            # Проверка формата файла
+            file_extension = file.filename.rpartition(".")[2].lower() if file.filename else ""
+            
+            if file_extension not in _ALLOWED_EXT:
+                raise HTTPException(
+                    status_code=400, 
+                    detail=f"Неподдерживаемый формат файла. Разрешены: {_ALLOWED_EXT_MSG}"
+                )
+            
+            # Чтение содержимого файла с ограничением размера
+            file_content = await _read_capped(file, FileHandler.MAX_FILE_SIZE)
+            
+            # Обработка файла в зависимости от формата
+            start_time = perf_counter_ns()
+            
+            texts = await _parse_file(file_extension, file_content)
+            
+            if not texts:
+                raise HTTPException(
+                    status_code=400,
+                    detail="В файле не найдено текстов для анализа"
+                )
+            
+            # Классификация текстов
+            results = await _predict_chunks(texts)
+            processing_time = (perf_counter_ns() - start_time) / 1e9
+            
+            content = orjson.dumps({
+                "filename": file.filename,
+                "size": len(file_content),
+                "results": [_result_to_dict(r) for r in results],
+                "total_processed": len(results),
+                "processing_time": round(processing_time, 2)
+            })
+            return Response(content=content, media_type="application/json")
+            
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Ошибка при обработке файла: {e}")
+            raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_model_info_bytes() -> bytes:
+    # Информация о модели меняется только при ее перезагрузке
+    return orjson.dumps(ModelInfo(**classifier.get_model_info()).model_dump())
+
+
+@router.get("/model-info", response_model=None, responses={200: {"model": ModelInfo}})
 async def get_model_info():
     """
     Получение информации о модели
     """
     try:
-        info = classifier.get_model_info()
-        return ModelInfo(**info)
+        return Response(content=_cached_model_info_bytes(), media_type="application/json")
     except Exception as e:
         logger.error(f"Ошибка при получении информации о модели: {e}")
         raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
 
-@router.get("/health")
-async def health_check():
-    """
-    Проверка состояния API
-    """
-    return {"status": "healthy", "message": "API работает нормально"}
+# Одновременные перезагрузки выполняются по очереди, а не параллельно
+_RELOAD_LOCK = asyncio.Lock()
 
 
-@router.get("/", response_class=HTMLResponse)
-async def get_web_interface():
+@router.post("/admin/reload")
+async def reload_model(current_user: User = Depends(get_current_admin_user)):
     """
-    Веб-интерфейс для тестирования API
+    Перезагрузка модели со сбросом кэшей информации о модели и результатов классификации
     """
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="ru">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Анализатор тональности отзывов</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css" rel="stylesheet">
-        <style>
-            body {
-                background-color: #f8f9fa;
-            }
-            .container {
-                max-width: 1000px;
-                margin-top: 30px;
-            }
-            .card {
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-                border: none;
-                margin-bottom: 20px;
-            }
-            .card-header {
-                background-color: #0d6efd;
-                color: white;
-                font-weight: bold;
-            }
-            .btn-primary {
-                background-color: #0d6efd;
-                border-color: #0d6efd;
-            }
-            .result-card {
-                margin-top: 20px;
-            }
-            .sentiment-positive {
-                color: #198754;
-                font-weight: bold;
-            }
-            .sentiment-negative {
-                color: #dc3545;
-                font-weight: bold;
-            }
-            .sentiment-neutral {
-                color: #6c757d;
-                font-weight: bold;
-            }
-            .confidence-bar {
-                height: 20px;
-                border-radius: 10px;
-                background-color: #e9ecef;
-                margin-top: 5px;
-            }
-            .confidence-fill {
-                height: 100%;
-                border-radius: 10px;
-                background-color: #0d6efd;
-            }
-            .file-upload-area {
-                border: 2px dashed #dee2e6;
-                border-radius: 10px;
-                padding: 30px;
-                text-align: center;
-                margin-bottom: 20px;
-                transition: all 0.3s ease;
-            }
-            .file-upload-area:hover {
-                border-color: #0d6efd;
-                background-color: #f8f9ff;
-            }
-            .loading {
-                display: none;
-            }
-            .batch-results {
-                max-height: 400px;
-                overflow-y: auto;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="text-center mb-4">
-                <h1 class="display-4">
-                    <i class="fas fa-brain text-primary"></i>
-                    Анализатор тональности отзывов
-                </h1>
-                <p class="lead">Многоязычная модель на основе XLM-RoBERTa для классификации отзывов</p>
-            </div>
-
-            <!-- Вкладки -->
-            <ul class="nav nav-tabs" id="myTab" role="tablist">
-                <li class="nav-item" role="presentation">
-                    <button class="nav-link active" id="single-tab" data-bs-toggle="tab" data-bs-target="#single" type="button" role="tab">
-                        <i class="fas fa-comment"></i> Один отзыв
-                    </button>
-                </li>
-                <li class="nav-item" role="presentation">
-                    <button class="nav-link" id="batch-tab" data-bs-toggle="tab" data-bs-target="#batch" type="button" role="tab">
-                        <i class="fas fa-list"></i> Пакетная обработка
-                    </button>
-                </li>
-                <li class="nav-item" role="presentation">
-                    <button class="nav-link" id="file-tab" data-bs-toggle="tab" data-bs-target="#file" type="button" role="tab">
-                        <i class="fas fa-file-upload"></i> Загрузка файла
-                    </button>
-                </li>
-            </ul>
-
-            <div class="tab-content" id="myTabContent">
-                <!-- Вкладка "Один отзыв" -->
-                <div class="tab-pane fade show active" id="single" role="tabpanel">
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-comment"></i> Анализ одного отзыва
-                        </div>
-                        <div class="card-body">
-                            <form id="single-form">
-                                <div class="mb-3">
-                                    <label for="single-text" class="form-label">Текст отзыва:</label>
-                                    <textarea class="form-control" id="single-text" rows="4" placeholder="Введите текст отзыва..." required></textarea>
-                                </div>
-                                <button type="submit" class="btn btn-primary">
-                                    <i class="fas fa-search"></i> Анализировать
-                                </button>
-                                <div class="spinner-border text-primary loading" role="status">
-                                    <span class="visually-hidden">Загрузка...</span>
-                                </div>
-                            </form>
-                            <div id="single-result" class="result-card"></div>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Вкладка "Пакетная обработка" -->
-                <div class="tab-pane fade" id="batch" role="tabpanel">
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-list"></i> Пакетная обработка отзывов
-                        </div>
-                        <div class="card-body">
-                            <form id="batch-form">
-                                <div class="mb-3">
-                                    <label for="batch-texts" class="form-label">Тексты отзывов (каждый с новой строки):</label>
-                                    <textarea class="form-control" id="batch-texts" rows="8" placeholder="Введите тексты отзывов, каждый с новой строки..." required></textarea>
-                                </div>
-                                <button type="submit" class="btn btn-primary">
-                                    <i class="fas fa-search"></i> Анализировать все
-                                </button>
-                                <div class="spinner-border text-primary loading" role="status">
-                                    <span class="visually-hidden">Загрузка...</span>
-                                </div>
-                            </form>
-                            <div id="batch-result" class="result-card"></div>
-                        </div>
-                    </div>
-                </div>
-
-                <!-- Вкладка "Загрузка файла" -->
-                <div class="tab-pane fade" id="file" role="tabpanel">
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-file-upload"></i> Загрузка файла с отзывами
-                        </div>
-                        <div class="card-body">
-                            <div class="file-upload-area" id="file-drop-area">
-                                <i class="fas fa-cloud-upload-alt fa-3x text-muted mb-3"></i>
-                                <h5>Перетащите файл сюда или нажмите для выбора</h5>
-                                <p class="text-muted">Поддерживаемые форматы: CSV, JSON, TXT (макс. размер: 10 МБ)</p>
-                                <input type="file" id="file-input" accept=".csv,.json,.txt" style="display: none;">
-                                <button type="button" class="btn btn-outline-primary" onclick="document.getElementById('file-input').click()">
-                                    <i class="fas fa-folder-open"></i> Выбрать файл
-                                </button>
-                            </div>
-                            <div id="file-info" class="alert alert-info" style="display: none;"></div>
-                            <button id="analyze-file-btn" class="btn btn-primary" style="display: none;" onclick="analyzeFile()">
-                                <i class="fas fa-search"></i> Анализировать файл
-                            </button>
-                            <div class="spinner-border text-primary loading" role="status">
-                                <span class="visually-hidden">Загрузка...</span>
-                            </div>
-                            <div id="file-result" class="result-card"></div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-
-            <!-- Информация о модели -->
-            <div class="card">
-                <div class="card-header">
-                    <i class="fas fa-info-circle"></i> Информация о модели
-                </div>
-                <div class="card-body">
-                    <div id="model-info">
-                        <div class="text-center">
-                            <div class="spinner-border text-primary" role="status">
-                                <span class="visually-hidden">Загрузка...</span>
-                            </div>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-        <script>
-            // Базовый URL API
-            const API_BASE = window.location.origin;
-
-            // Функции для работы с API
-            async function analyzeSingleReview(text) {
-                const response = await fetch(`${API_BASE}/api/classify`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ text: text }),
-                });
-                return await response.json();
-            }
-
-            async function analyzeBatchReviews(texts) {
-                const response = await fetch(`${API_BASE}/api/classify-batch`, {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json',
-                    },
-                    body: JSON.stringify({ texts: texts }),
-                });
-                return await response.json();
-            }
-
-            async function uploadFile(file) {
-                const formData = new FormData();
-                formData.append('file', file);
-
-                const response = await fetch(`${API_BASE}/api/upload-file`, {
-                    method: 'POST',
-                    body: formData,
-                });
-                return await response.json();
-            }
+    try:
+        async with _RELOAD_LOCK:
+            await run_in_threadpool(classifier.load_model)
+            _cached_model_info_bytes.cache_clear()
+            _pred_cache.clear()
+        return {"status": "ok", "message": "Модель перезагружена"}
+    except Exception as e:
+        logger.error(f"Ошибка при перезагрузке модели: {e}")
+        raise HTTPException(status_code=500, detail="Внутренняя ошибка сервера")
 
-            async function getModelInfo() {
-                const response = await fetch(`${API_BASE}/api/model-info`);
-                return await response.json();
-            }
 
-            // Функции для отображения результатов
-            function displaySingleResult(result) {
-                const sentimentClass = `sentiment-${result.sentiment}`;
-                const sentimentText = {
-                    'positive': 'Положительный',
-                    'negative': 'Отрицательный',
-                    'neutral': 'Нейтральный'
-                }[result.sentiment];
-
-                const html = `
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-chart-line"></i> Результат анализа
-                        </div>
-                        <div class="card-body">
-                            <p><strong>Текст:</strong> ${result.text}</p>
-                            <p><strong>Тональность:</strong> <span class="${sentimentClass}">${sentimentText}</span></p>
-                            <p><strong>Уверенность:</strong> ${(result.confidence * 100).toFixed(2)}%</p>
-                            <div class="confidence-bar">
-                                <div class="confidence-fill" style="width: ${result.confidence * 100}%"></div>
-                            </div>
-                        </div>
-                    </div>
-                `;
-                document.getElementById('single-result').innerHTML = html;
-            }
+# Ответ проверки состояния не меняется, поэтому сериализуется один раз при импорте
+_HEALTH_BYTES = orjson.dumps({"status": "healthy", "message": "API работает нормально"})
+_HEALTH_WARMING_BYTES = orjson.dumps({"status": "warming", "message": "Модель загружается"})
 
-            function displayBatchResult(results) {
-                const positiveCount = results.positive_count;
-                const negativeCount = results.negative_count;
-                const neutralCount = results.neutral_count;
-                const total = results.total;
-
-                let resultsHtml = '<div class="batch-results">';
-                results.results.forEach((result, index) => {
-                    const sentimentClass = `sentiment-${result.sentiment}`;
-                    const sentimentText = {
-                        'positive': 'Положительный',
-                        'negative': 'Отрицательный',
-                        'neutral': 'Нейтральный'
-                    }[result.sentiment];
-
-                    resultsHtml += `
-                        <div class="card mb-2">
-                            <div class="card-body">
-                                <p class="mb-1"><strong>${index + 1}.</strong> ${result.text}</p>
-                                <p class="mb-1"><strong>Тональность:</strong> <span class="${sentimentClass}">${sentimentText}</span> (${(result.confidence * 100).toFixed(2)}%)</p>
-                            </div>
-                        </div>
-                    `;
-                });
-                resultsHtml += '</div>';
-
-                const html = `
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-chart-pie"></i> Статистика
-                        </div>
-                        <div class="card-body">
-                            <div class="row">
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-positive">${positiveCount}</h4>
-                                        <p>Положительных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-negative">${negativeCount}</h4>
-                                        <p>Отрицательных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-neutral">${neutralCount}</h4>
-                                        <p>Нейтральных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4>${total}</h4>
-                                        <p>Всего</p>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    ${resultsHtml}
-                `;
-                document.getElementById('batch-result').innerHTML = html;
-            }
 
-            function displayFileResult(result) {
-                const positiveCount = result.results.filter(r => r.sentiment === 'positive').length;
-                const negativeCount = result.results.filter(r => r.sentiment === 'negative').length;
-                const neutralCount = result.results.filter(r => r.sentiment === 'neutral').length;
-
-                let resultsHtml = '<div class="batch-results">';
-                result.results.forEach((item, index) => {
-                    const sentimentClass = `sentiment-${item.sentiment}`;
-                    const sentimentText = {
-                        'positive': 'Положительный',
-                        'negative': 'Отрицательный',
-                        'neutral': 'Нейтральный'
-                    }[item.sentiment];
-
-                    resultsHtml += `
-                        <div class="card mb-2">
-                            <div class="card-body">
-                                <p class="mb-1"><strong>${index + 1}.</strong> ${item.text}</p>
-                                <p class="mb-1"><strong>Тональность:</strong> <span class="${sentimentClass}">${sentimentText}</span> (${(item.confidence * 100).toFixed(2)}%)</p>
-                            </div>
-                        </div>
-                    `;
-                });
-                resultsHtml += '</div>';
-
-                const html = `
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-file-alt"></i> Информация о файле
-                        </div>
-                        <div class="card-body">
-                            <p><strong>Имя файла:</strong> ${result.filename}</p>
-                            <p><strong>Размер:</strong> ${(result.size / 1024).toFixed(2)} КБ</p>
-                            <p><strong>Обработано отзывов:</strong> ${result.total_processed}</p>
-                            <p><strong>Время обработки:</strong> ${result.processing_time} сек.</p>
-                        </div>
-                    </div>
-                    <div class="card">
-                        <div class="card-header">
-                            <i class="fas fa-chart-pie"></i> Статистика
-                        </div>
-                        <div class="card-body">
-                            <div class="row">
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-positive">${positiveCount}</h4>
-                                        <p>Положительных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-negative">${negativeCount}</h4>
-                                        <p>Отрицательных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4 class="sentiment-neutral">${neutralCount}</h4>
-                                        <p>Нейтральных</p>
-                                    </div>
-                                </div>
-                                <div class="col-md-3">
-                                    <div class="text-center">
-                                        <h4>${result.total_processed}</h4>
-                                        <p>Всего</p>
-                                    </div>
-                                </div>
-                            </div>
-                        </div>
-                    </div>
-                    ${resultsHtml}
-                `;
-                document.getElementById('file-result').innerHTML = html;
-            }
+@router.get("/health")
+async def health_check():
+    """
+    Проверка состояния API
+    """
+    content = _HEALTH_BYTES if _model_ready else _HEALTH_WARMING_BYTES
+    return Response(content=content, media_type="application/json")
 
-            function displayModelInfo(info) {
-                const html = `
-                    <div class="row">
-                        <div class="col-md-6">
-                            <p><strong>Название модели:</strong> ${info.name}</p>
-                            <p><strong>Описание:</strong> ${info.description}</p>
-                        </div>
-                        <div class="col-md-6">
-                            <p><strong>Макс. длина текста:</strong> ${info.max_text_length} символов</p>
-                            <p><strong>Поддерживаемые языки:</strong></p>
-                            <ul>
-                                ${info.languages.map(lang => `<li>${lang}</li>`).join('')}
-                            </ul>
-                        </div>
-                    </div>
-                `;
-                document.getElementById('model-info').innerHTML = html;
-            }
 
-            // Обработчики событий
-            document.getElementById('single-form').addEventListener('submit', async (e) => {
-                e.preventDefault();
-                const text = document.getElementById('single-text').value;
-                
-                document.querySelector('#single-form .loading').style.display = 'inline-block';
-                document.querySelector('#single-form button[type="submit"]').disabled = true;
-                
-                try {
-                    const result = await analyzeSingleReview(text);
-                    displaySingleResult(result);
-                } catch (error) {
-                    alert('Ошибка при анализе отзыва: ' + error.message);
-                } finally {
-                    document.querySelector('#single-form .loading').style.display = 'none';
-                    document.querySelector('#single-form button[type="submit"]').disabled = false;
-                }
-            });
-
-            document.getElementById('batch-form').addEventListener('submit', async (e) => {
-                e.preventDefault();
-                const texts = document.getElementById('batch-texts').value.split('\\n').filter(text => text.trim());
-                
-                if (texts.length === 0) {
-                    alert('Пожалуйста, введите хотя бы один отзыв');
-                    return;
-                }
-                
-                document.querySelector('#batch-form .loading').style.display = 'inline-block';
-                document.querySelector('#batch-form button[type="submit"]').disabled = true;
-                
-                try {
-                    const result = await analyzeBatchReviews(texts);
-                    displayBatchResult(result);
-                } catch (error) {
-                    alert('Ошибка при анализе отзывов: ' + error.message);
-                } finally {
-                    document.querySelector('#batch-form .loading').style.display = 'none';
-                    document.querySelector('#batch-form button[type="submit"]').disabled = false;
-                }
-            });
-
-            let selectedFile = null;
-
-            // Обработка загрузки файла
-            const fileInput = document.getElementById('file-input');
-            const fileDropArea = document.getElementById('file-drop-area');
-
-            fileInput.addEventListener('change', (e) => {
-                const file = e.target.files[0];
-                if (file) {
-                    handleFileSelect(file);
-                }
-            });
-
-            // Drag and drop
-            fileDropArea.addEventListener('dragover', (e) => {
-                e.preventDefault();
-                fileDropArea.classList.add('border-primary');
-            });
-
-            fileDropArea.addEventListener('dragleave', () => {
-                fileDropArea.classList.remove('border-primary');
-            });
-
-            fileDropArea.addEventListener('drop', (e) => {
-                e.preventDefault();
-                fileDropArea.classList.remove('border-primary');
-                
-                const file = e.dataTransfer.files[0];
-                if (file) {
-                    handleFileSelect(file);
-                }
-            });
-
-            function handleFileSelect(file) {
-                const allowedExtensions = ['csv', 'json', 'txt'];
-                const fileExtension = file.name.split('.').pop().toLowerCase();
-                
-                if (!allowedExtensions.includes(fileExtension)) {
-                    alert('Неподдерживаемый формат файла. Разрешены: CSV, JSON, TXT');
-                    return;
-                }
-                
-                if (file.size > 10 * 1024 * 1024) { // 10 МБ
-                    alert('Размер файла превышает максимально допустимый (10 МБ)');
-                    return;
-                }
-                
-                selectedFile = file;
-                document.getElementById('file-info').innerHTML = `
-                    <i class="fas fa-file"></i> Выбран файл: <strong>${file.name}</strong> (${(file.size / 1024).toFixed(2)} КБ)
-                `;
-                document.getElementById('file-info').style.display = 'block';
-                document.getElementById('analyze-file-btn').style.display = 'inline-block';
-            }
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """
+    Статистика кэша результатов классификации
+    """
+    return {
+        "size": len(_pred_cache),
+        "maxsize": _pred_cache.maxsize,
+        **_cache_stats
+    }
+
+
+# Статическая страница веб-интерфейса отдается с диска через sendfile,
+# а клиентам с поддержкой gzip - заранее сжатой копией из памяти
+_INDEX_PATH: Final[Path] = Path(__file__).resolve().parent.parent / "static" / "index.html"
+_INDEX_STAT: Final[os.stat_result] = os.stat(_INDEX_PATH)
+_INDEX_GZIP: Final[bytes] = gzip.compress(_INDEX_PATH.read_bytes(), compresslevel=9)
+_INDEX_HEADERS: Final[dict] = {"Cache-Control": "public, max-age=3600"}
+# Несжатый ответ получает Vary от GZipMiddleware, заранее сжатый и 304 - отсюда
+_INDEX_VARY_HEADERS: Final[dict] = {**_INDEX_HEADERS, "Vary": "Accept-Encoding"}
+# Валидаторы кэша вычисляются так же, как в FileResponse, но один раз при импорте
+_INDEX_ETAG_BASE: Final[str] = hashlib.md5(
+    f"{_INDEX_STAT.st_mtime}-{_INDEX_STAT.st_size}".encode(), usedforsecurity=False
+).hexdigest()
+_INDEX_ETAG: Final[str] = f'"{_INDEX_ETAG_BASE}"'
+_INDEX_GZIP_ETAG: Final[str] = f'"{_INDEX_ETAG_BASE}-gzip"'
+_INDEX_LAST_MODIFIED: Final[str] = formatdate(_INDEX_STAT.st_mtime, usegmt=True)
 
-            async function analyzeFile() {
-                if (!selectedFile) {
-                    alert('Файл не выбран');
-                    return;
-                }
-                
-                document.querySelector('#file .loading').style.display = 'inline-block';
-                document.getElementById('analyze-file-btn').disabled = true;
-                
-                try {
-                    const result = await uploadFile(selectedFile);
-                    displayFileResult(result);
-                } catch (error) {
-                    alert('Ошибка при обработке файла: ' + error.message);
-                } finally {
-                    document.querySelector('#file .loading').style.display = 'none';
-                    document.getElementById('analyze-file-btn').disabled = false;
-                }
-            }
 
-            // Загрузка информации о модели при загрузке страницы
-            window.addEventListener('load', async () => {
-                try {
-                    const info = await getModelInfo();
-                    displayModelInfo(info);
-                } catch (error) {
-                    document.getElementById('model-info').innerHTML = '<p class="text-danger">Ошибка при загрузке информации о модели</p>';
-                }
-            });
-        </script>
-    </body>
-    </html>
+@router.get("/", response_class=HTMLResponse)
+async def get_web_interface(request: Request):
     """
-    return HTMLResponse(content=html_content)
\ No newline at end of file
+    Веб-интерфейс для тестирования API
+    """
+    use_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    etag = _INDEX_GZIP_ETAG if use_gzip else _INDEX_ETAG
+    
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={**_INDEX_VARY_HEADERS, "ETag": etag})
+    
+    if use_gzip:
+        return Response(
+            content=_INDEX_GZIP,
+            media_type="text/html",
+            headers={
+                **_INDEX_VARY_HEADERS,
+                "Content-Encoding": "gzip",
+                "ETag": etag,
+                "Last-Modified": _INDEX_LAST_MODIFIED
+            }
+        )
+    return FileResponse(
+        _INDEX_PATH,
+        media_type="text/html",
+        headers=_INDEX_HEADERS,
+        stat_result=_INDEX_STAT
+    )
\ No newline at end of file
@@ -0,0 +1,37 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+
+from app.auth import security
+
+# bcrypt освобождает GIL на время хеширования, поэтому пула потоков достаточно
+MAX_WORKERS = 2 * (os.cpu_count() or 1)
+# Максимальное число операций, ожидающих выполнения; сверх него запросы отклоняются с 503
+MAX_QUEUE = 500
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="bcrypt")
+_queue = asyncio.Semaphore(MAX_QUEUE)
+
+
+async def _run(func, *args):
+    """Выполнение bcrypt-операции в пуле без блокировки цикла событий"""
+    if _queue.locked():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": "1"},
+        )
+    async with _queue:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_pool, func, *args)
+
+
+async def hash_password(password: str) -> str:
+    """Асинхронное создание хеша пароля"""
+    return await _run(security.get_password_hash, password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Асинхронная проверка соответствия пароля хешу"""
+    return await _run(security.verify_password, plain_password, hashed_password)
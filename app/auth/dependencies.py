@@ -1,33 +1,69 @@
+import time
+import hashlib
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
 from app.db.crud import get_user_by_username
 from app.auth.security import verify_token
 from app.db.models import User
+from app.core.config import ADMIN_USERNAMES
 
 security = HTTPBearer()
 
+# Кэш пользователей по хешу токена, чтобы не обращаться к БД на каждый запрос.
+# Используется только из корутин в потоке цикла событий, поэтому блокировка не нужна
+AUTH_CACHE_TTL = 30
+_auth_cache: TTLCache = TTLCache(maxsize=10_000, ttl=AUTH_CACHE_TTL)
 
-def get_current_user(
+
+def _token_key(token: str) -> bytes:
+    return hashlib.blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Получение текущего пользователя по JWT токену"""
+    token = credentials.credentials
+    key = _token_key(token)
+    cached = _auth_cache.get(key)
+    if cached is not None:
+        user, expire = cached
+        if expire > time.time():
+            return user
+        _auth_cache.pop(key, None)
+
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = verify_token(credentials.credentials, credentials_exception)
-    user = get_user_by_username(db, username=token_data.username)
+    token_data = verify_token(token, credentials_exception)
+    user = await get_user_by_username(db, username=token_data.username)
     if user is None:
         raise credentials_exception
+
+    # Неактивных пользователей не кэшируем, чтобы проверка активности всегда шла по БД
+    if user.is_active:
+        _auth_cache[key] = (user, token_data.exp)
     return user
 
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: User = Depends(get_current_user)):
     """Проверка, что пользователь активен"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+    """Проверка, что пользователь входит в список администраторов"""
+    if current_user.username not in ADMIN_USERNAMES:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
     return current_user
\ No newline at end of file
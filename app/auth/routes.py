@@ -1,54 +1,58 @@
-from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.database import get_db
-from app.db.crud import authenticate_user, create_user, get_user_by_username, get_user_by_email
+from app.db.crud import authenticate_user, create_user, get_conflict
 from app.auth.schemas import Token, UserCreate, User
 from app.auth.security import create_access_token
 from app.auth.dependencies import get_current_active_user
-from app.core.config import settings
+from app.core.config import TOKEN_TTL
 
 router = APIRouter()
 
 
 @router.get("/test-db")
-async def test_db(db: Session = Depends(get_db)):
+async def test_db(db: AsyncSession = Depends(get_db)):
     """Тестовый эндпоинт для проверки работы с базой данных"""
     try:
         # Проверка подключения к БД
         from app.db.crud import get_user_by_username
-        user = get_user_by_username(db, "test")
+        user = await get_user_by_username(db, "test")
         return {"status": "ok", "user_exists": user is not None}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Регистрация нового пользователя
     """
     try:
-        # Проверка существования пользователя по имени
-        db_user = get_user_by_username(db, username=user.username)
-        if db_user:
+        # Проверка существования пользователя по имени или email одним запросом
+        conflict = await get_conflict(db, username=user.username, email=user.email)
+        if conflict == "username":
             raise HTTPException(
                 status_code=400,
                 detail="Username already registered"
             )
-        
-        # Проверка существования пользователя по email
-        db_user = get_user_by_email(db, email=user.email)
-        if db_user:
+        if conflict == "email":
             raise HTTPException(
                 status_code=400,
                 detail="Email already registered"
             )
         
-        return create_user(db=db, username=user.username, email=user.email, password=user.password)
+        return await create_user(db=db, username=user.username, email=user.email, password=user.password)
     except HTTPException:
         raise
+    except IntegrityError:
+        # Параллельная регистрация с теми же данными отсекается ограничениями UNIQUE в БД
+        await db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Username or email already registered"
+        )
     except Exception as e:
         # Логирование ошибки
         import logging
@@ -63,12 +67,12 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Аутентификация пользователя и получение JWT токена
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,9 +86,8 @@ async def login(
             detail="Inactive user"
         )
     
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=TOKEN_TTL
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
@@ -1,51 +1,59 @@
-from datetime import datetime, timedelta
+import time
+from datetime import timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 
-from app.core.config import settings
+from app.core.config import ALGO, SECRET, BCRYPT_ROUNDS
+from app.auth.schemas import TokenData
 
+# Параметры проверки JWT вычисляются один раз: обязательные claims проверяет сам jose
+_ALGS = (ALGO,)
+_DECODE_OPTS = {"require_exp": True, "require_sub": True, "verify_aud": False}
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
+
+# bcrypt учитывает только первые 72 байта пароля в кодировке UTF-8
+BCRYPT_MAX_PASSWORD_BYTES = 72
+
+# Время жизни токена по умолчанию, если expires_delta не передан
+DEFAULT_TOKEN_TTL_SECONDS = 15 * 60
+
+
+def _encode_password(password: str) -> bytes:
+    """Кодирование пароля в UTF-8 с обрезкой до 72 байт (ограничение bcrypt)"""
+    return password.encode('utf-8')[:BCRYPT_MAX_PASSWORD_BYTES]
+
+
+def verify_password(plain_password: str, hashed_password) -> bool:
     """Проверка соответствия пароля хешу"""
-    # Обрезаем пароль до 72 символов, если он длиннее (ограничение bcrypt)
-    if len(plain_password) > 72:
-        plain_password = plain_password[:72]
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+    if not isinstance(hashed_password, bytes):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(_encode_password(plain_password), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Создание хеша пароля"""
-    # Обрезаем пароль до 72 символов, если он длиннее (ограничение bcrypt)
-    if len(password) > 72:
-        password = password[:72]
     # Генерируем соль и хешируем пароль
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(_encode_password(password), salt)
     return hashed.decode('utf-8')
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Создание JWT токена"""
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
+    ttl = int(expires_delta.total_seconds()) if expires_delta else DEFAULT_TOKEN_TTL_SECONDS
+    to_encode["exp"] = int(time.time()) + ttl
+    encoded_jwt = jwt.encode(to_encode, SECRET, algorithm=ALGO)
     return encoded_jwt
 
 
 def verify_token(token: str, credentials_exception):
     """Проверка JWT токена"""
+    # Повторные проверки одного токена отсекает кэш пользователей в app.auth.dependencies
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        from app.auth.schemas import TokenData
-        token_data = TokenData(username=username)
+        payload = jwt.decode(token, SECRET, algorithms=_ALGS, options=_DECODE_OPTS)
+        token_data = TokenData(username=payload["sub"], exp=payload["exp"])
     except JWTError:
         raise credentials_exception
-    return token_data
\ No newline at end of file
+    return token_data
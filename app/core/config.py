@@ -1,5 +1,8 @@
+from datetime import timedelta
+from functools import lru_cache
+from pydantic import Field
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -8,11 +11,29 @@ class Settings(BaseSettings):
     port: int = 8000
     debug: bool = True
     max_text_length: int = 512
+    # Тексты короче этой длины (без пробелов) получают нейтральный результат без вызова модели
+    min_text_length: int = 1
+    
+    # Оптимизации инференса: компиляция модели и int8-квантование на CPU
+    torch_compile: bool = False
+    quantize_int8: bool = False
+    
+    # Размер LRU-кэша результатов классификации
+    prediction_cache_size: int = 100_000
+    
+    # Максимальное число одновременно обрабатываемых загрузок файлов
+    upload_concurrency: int = 4
+    # Максимальное число одновременных вызовов модели при классификации файлов
+    infer_concurrency: int = 8
     
     # Настройки безопасности
     secret_key: str = "your-secret-key-change-this-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Стоимость bcrypt (2^rounds итераций): 12 для продакшена, 4 достаточно для тестов
+    bcrypt_rounds: int = Field(12, ge=4, le=31)
+    # Пользователи, которым разрешены административные операции (перезагрузка модели)
+    admin_usernames: List[str] = []
     
     # Настройки базы данных
     database_url: str = "sqlite:///./sentiment_analyzer.db"
@@ -22,4 +43,17 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
+
+# Часто используемые значения настроек для горячих путей (классификация, проверка токенов)
+MAX_TEXT_LEN = settings.max_text_length
+ALGO = settings.algorithm
+SECRET = settings.secret_key
+TOKEN_TTL = timedelta(minutes=settings.access_token_expire_minutes)
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+ADMIN_USERNAMES = frozenset(settings.admin_usernames)
\ No newline at end of file
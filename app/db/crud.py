@@ -1,37 +1,54 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models import User
-from app.auth.security import get_password_hash, verify_password
+from app.auth.bcrypt_pool import hash_password, verify_password
 
 
-def get_user(db: Session, user_id: int):
-    return db.query(User).filter(User.id == user_id).first()
+async def get_user(db: AsyncSession, user_id: int):
+    return await db.get(User, user_id)
 
 
-def get_user_by_username(db: Session, username: str):
-    return db.query(User).filter(User.username == username).first()
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-def create_user(db: Session, username: str, email: str, password: str):
-    hashed_password = get_password_hash(password)
+async def get_conflict(db: AsyncSession, username: str, email: str) -> Optional[str]:
+    """Поиск пользователя с таким же именем или email одним запросом; возвращает имя занятого поля"""
+    result = await db.execute(
+        select(User.username, User.email)
+        .where(or_(User.username == username, User.email == email))
+        .limit(1)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return "username" if row.username == username else "email"
+
+
+async def create_user(db: AsyncSession, username: str, email: str, password: str):
+    hashed_password = await hash_password(password)
     db_user = User(
         username=username,
         email=email,
         hashed_password=hashed_password
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = await get_user_by_username(db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password(password, user.hashed_password):
         return False
     return user
\ No newline at end of file
@@ -1,10 +1,14 @@
+import os
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-from app.api.endpoints import router
-from app.models.mock_classifier import mock_classifier as classifier
+from app.api.endpoints import router, batcher, warmup_model, start_process_pool, shutdown_process_pool
 from app.core.config import settings
 from app.db.database import engine
 from app.db import models
@@ -18,31 +22,50 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _on_warmup_done(task: asyncio.Task):
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error(f"Ошибка при загрузке модели: {error}")
+    else:
+        logger.info("Модель успешно загружена")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Запуск приложения
     logger.info("Запуск приложения...")
     
+    # Размер пула потоков для синхронных вызовов модели и парсеров файлов
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = max(limiter.total_tokens, (os.cpu_count() or 1) * 4)
+    
     # Создание таблиц в базе данных
     try:
-        models.Base.metadata.create_all(bind=engine)
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.create_all)
         logger.info("База данных инициализирована")
     except Exception as e:
         logger.error(f"Ошибка при инициализации базы данных: {e}")
         raise
     
-    # Загрузка модели
-    try:
-        classifier.load_model()
-        logger.info("Модель успешно загружена")
-    except Exception as e:
-        logger.error(f"Ошибка при загрузке модели: {e}")
-        raise
+    # Загрузка модели в фоне: /health отвечает сразу, классификация доступна после загрузки
+    app.state.warmup = asyncio.create_task(asyncio.to_thread(warmup_model))
+    app.state.warmup.add_done_callback(_on_warmup_done)
+    
+    # Запуск очереди пакетной классификации и пула процессов для разбора файлов
+    batcher.start()
+    start_process_pool()
     
     yield
     
     # Завершение работы приложения
     logger.info("Завершение работы приложения...")
+    app.state.warmup.cancel()
+    await batcher.stop()
+    shutdown_process_pool()
+    await engine.dispose()
 
 
 # Создание FastAPI приложения
@@ -62,6 +85,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Сжатие крупных ответов (пакетная классификация, загрузка файлов)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Подключение роутеров
 app.include_router(router, prefix="/api")
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
@@ -85,9 +111,12 @@ async def root():
         "endpoints": {
             "classify": "/api/classify",
             "classify_batch": "/api/classify-batch",
+            "classify_batch_stream": "/api/classify-batch-stream",
             "upload_file": "/api/upload-file",
             "model_info": "/api/model-info",
-            "health": "/api/health"
+            "reload_model": "/api/admin/reload",
+            "health": "/api/health",
+            "cache_stats": "/api/cache-stats"
         }
     }
 
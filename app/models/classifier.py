@@ -1,8 +1,10 @@
+import os
+import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from typing import List, Dict, Tuple
 import logging
-from app.core.config import settings
+from app.core.config import settings, MAX_TEXT_LEN
 from app.models.schemas import SentimentResult, SentimentLabel
 
 logger = logging.getLogger(__name__)
@@ -21,21 +23,64 @@ class SentimentClassifier:
             3: SentimentLabel.POSITIVE,
             4: SentimentLabel.POSITIVE
         }
+        # Массив меток для векторной выборки по индексам предсказанных классов
+        self._label_arr = np.array(
+            [self.label_mapping[i] for i in range(len(self.label_mapping))], dtype=object
+        )
+        # Информация о модели не меняется, поэтому собирается один раз
+        self._info = {
+            "name": self.model_name,
+            "description": "Многоязычная модель для анализа тональности на основе BERT",
+            "languages": ["Русский", "Английский", "Немецкий", "Французский", "Итальянский", "Испанский", "Португальский", "Нидерландский", "Китайский", "Японский"],
+            "max_text_length": settings.max_text_length
+        }
         
     def load_model(self):
         """Загрузка модели и токенизатора"""
         try:
             logger.info(f"Загрузка модели {self.model_name}...")
-            # Используем use_fast=False для избежания проблем с токенизатором
-            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=False)
-            self.model = AutoModelForSequenceClassification.from_pretrained(self.model_name)
+            # Быстрый токенизатор (Rust, пакет tokenizers) обрабатывает пакеты текстов в нативном коде
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name, use_fast=True)
+            if not self.tokenizer.is_fast:
+                logger.warning(f"Для модели {self.model_name} недоступен быстрый токенизатор")
+            self.model = AutoModelForSequenceClassification.from_pretrained(
+                self.model_name,
+                torch_dtype=self._select_dtype()
+            )
             self.model.to(self.device)
             self.model.eval()
+            
+            if self.device.type == "cpu":
+                torch.set_num_threads(os.cpu_count() or 1)
+                if settings.quantize_int8:
+                    # Динамическое int8-квантование линейных слоев для CPU
+                    self.model = torch.quantization.quantize_dynamic(
+                        self.model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            
+            if settings.torch_compile and hasattr(torch, "compile"):
+                # Компиляция ленивая: ошибки проявляются только при первом вызове,
+                # поэтому пробный прогон выполняется здесь, а при сбое остается обычный режим
+                eager_model = self.model
+                try:
+                    self.model = torch.compile(eager_model, fullgraph=False)
+                    sample = self.tokenizer(["warmup"], return_tensors="pt", padding=True).to(self.device)
+                    with torch.inference_mode():
+                        self.model(**sample)
+                except Exception as e:
+                    self.model = eager_model
+                    logger.warning(f"Не удалось скомпилировать модель, используется обычный режим: {e}")
             logger.info(f"Модель успешно загружена на устройстве {self.device}")
         except Exception as e:
             logger.error(f"Ошибка при загрузке модели: {e}")
             raise
     
+    def _select_dtype(self) -> torch.dtype:
+        """Выбор типа данных весов: BF16/FP16 на GPU, FP32 на CPU"""
+        if self.device.type != "cuda":
+            return torch.float32
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    
     def preprocess_text(self, text: str) -> str:
         """Предобработка текста"""
         # Базовая предобработка - удаление лишних пробелов
@@ -49,18 +94,14 @@ class SentimentClassifier:
         # Предобработка текста
         processed_text = self.preprocess_text(text)
         
-        # Ограничение длины текста
-        if len(processed_text) > settings.max_text_length:
-            processed_text = processed_text[:settings.max_text_length]
-        
         try:
-            # Токенизация
+            # Токенизация с обрезкой до MAX_TEXT_LEN токенов по границам подслов
             inputs = self.tokenizer(
                 processed_text,
                 return_tensors="pt",
                 truncation=True,
                 padding=True,
-                max_length=settings.max_text_length
+                max_length=MAX_TEXT_LEN
             )
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
             
@@ -90,21 +131,54 @@ class SentimentClassifier:
             )
     
     def predict_batch(self, texts: List[str]) -> List[SentimentResult]:
-        """Классификация списка текстов"""
-        results = []
-        for text in texts:
-            result = self.predict_single(text)
-            results.append(result)
-        return results
+        """Классификация списка текстов одним прямым проходом модели"""
+        if not texts:
+            return []
+        if not self.model or not self.tokenizer:
+            self.load_model()
+        
+        processed_texts = [self.preprocess_text(text) for text in texts]
+        
+        try:
+            # Токенизация всего пакета с выравниванием по самому длинному тексту
+            inputs = self.tokenizer(
+                processed_texts,
+                return_tensors="pt",
+                truncation=True,
+                padding=True,
+                max_length=MAX_TEXT_LEN
+            ).to(self.device)
+            
+            # Предсказание для всего пакета
+            with torch.inference_mode():
+                logits = self.model(**inputs).logits
+                confidences, predicted_classes = logits.softmax(dim=-1).max(dim=-1)
+            
+            sentiments = self._label_arr[predicted_classes.cpu().numpy()]
+            
+            # Значения формируются самим классификатором, поэтому повторная валидация не нужна
+            return [
+                SentimentResult.model_construct(
+                    text=text,
+                    sentiment=sentiment,
+                    confidence=round(confidence, 4)
+                )
+                for text, sentiment, confidence in zip(
+                    texts, sentiments, confidences.tolist()
+                )
+            ]
+            
+        except Exception as e:
+            logger.error(f"Ошибка при пакетной классификации текстов: {e}")
+            # Возвращаем нейтральные результаты в случае ошибки
+            return [
+                SentimentResult(text=text, sentiment=SentimentLabel.NEUTRAL, confidence=0.0)
+                for text in texts
+            ]
     
     def get_model_info(self) -> Dict:
         """Получение информации о модели"""
-        return {
-            "name": self.model_name,
-            "description": "Многоязычная модель для анализа тональности на основе BERT",
-            "languages": ["Русский", "Английский", "Немецкий", "Французский", "Итальянский", "Испанский", "Португальский", "Нидерландский", "Китайский", "Японский"],
-            "max_text_length": settings.max_text_length
-        }
+        return self._info
 
 
 # Глобальный экземпляр классификатора
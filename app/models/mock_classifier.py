@@ -1,11 +1,16 @@
 import random
 from typing import List, Dict
 import logging
+import numpy as np
 from app.core.config import settings
 from app.models.schemas import SentimentResult, SentimentLabel
 
 logger = logging.getLogger(__name__)
 
+# Генератор для векторизованной имитации пакетной классификации
+_rng = np.random.default_rng()
+_LABELS = list(SentimentLabel)
+
 
 class MockSentimentClassifier:
     """
@@ -14,6 +19,13 @@ class MockSentimentClassifier:
     def __init__(self):
         self.model_name = settings.model_name
         self.loaded = False
+        # Информация о модели не меняется, поэтому собирается один раз
+        self._info = {
+            "name": self.model_name,
+            "description": "Мок-модель для демонстрации работы API",
+            "languages": ["Русский", "Английский", "Немецкий", "Французский", "Итальянский", "Испанский", "Португальский", "Нидерландский", "Китайский", "Японский"],
+            "max_text_length": settings.max_text_length
+        }
         
     def load_model(self):
         """Имитация загрузки модели"""
@@ -48,20 +60,22 @@ class MockSentimentClassifier:
     
     def predict_batch(self, texts: List[str]) -> List[SentimentResult]:
         """Классификация списка текстов"""
-        results = []
-        for text in texts:
-            result = self.predict_single(text)
-            results.append(result)
-        return results
+        if not self.loaded:
+            self.load_model()
+        
+        # Имитация классификации сразу для всего пакета
+        labels = _rng.integers(0, len(_LABELS), size=len(texts)).tolist()
+        confidences = _rng.uniform(0.7, 0.99, size=len(texts)).round(4).tolist()
+        
+        # Значения формируются самим классификатором, поэтому повторная валидация не нужна
+        return [
+            SentimentResult.model_construct(text=text, sentiment=_LABELS[label], confidence=confidence)
+            for text, label, confidence in zip(texts, labels, confidences)
+        ]
     
     def get_model_info(self) -> Dict:
         """Получение информации о модели"""
-        return {
-            "name": self.model_name,
-            "description": "Мок-модель для демонстрации работы API",
-            "languages": ["Русский", "Английский", "Немецкий", "Французский", "Итальянский", "Испанский", "Португальский", "Нидерландский", "Китайский", "Японский"],
-            "max_text_length": settings.max_text_length
-        }
+        return self._info
 
 
 # Глобальный экземпляр мок-классификатора
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, ConfigDict, Field, validator
 from typing import List, Optional, Dict, Any
 from enum import Enum
 
@@ -10,15 +10,11 @@ class SentimentLabel(str, Enum):
 
 
 class SentimentResult(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='forbid')
+    
     text: str
     sentiment: SentimentLabel
     confidence: float = Field(..., ge=0.0, le=1.0, description="Уверенность модели в предсказании от 0 до 1")
-    
-    @validator('confidence')
-    def validate_confidence(cls, v):
-        if not 0 <= v <= 1:
-            raise ValueError('Уверенность должна быть в диапазоне от 0 до 1')
-        return v
 
 
 class SingleReviewRequest(BaseModel):
@@ -1,7 +1,7 @@
 import csv
 import json
 import io
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +10,18 @@ logger = logging.getLogger(__name__)
 class FileHandler:
     """Класс для обработки файлов с отзывами"""
     
+    # Максимально допустимый размер загружаемого файла
+    MAX_FILE_SIZE_MB = 10
+    MAX_FILE_SIZE = MAX_FILE_SIZE_MB * 1024 * 1024
+    
+    @staticmethod
+    def _text_stream(file_content: bytes, newline: str) -> io.TextIOWrapper:
+        """
+        Поток текста поверх байтов файла: декодирование идет по мере чтения,
+        без создания полной строковой копии содержимого
+        """
+        return io.TextIOWrapper(io.BytesIO(file_content), encoding='utf-8', newline=newline)
+    
     @staticmethod
     def process_csv_file(file_content: bytes) -> Tuple[List[str], str]:
         """
@@ -17,8 +29,7 @@ class FileHandler:
         Возвращает список текстов и имя колонки
         """
         try:
-            content = file_content.decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(content))
+            csv_reader = csv.DictReader(FileHandler._text_stream(file_content, newline=''))
             
             # Поиск колонки с текстом
             text_column = None
@@ -36,17 +47,30 @@ class FileHandler:
             if not text_column:
                 raise ValueError("Не удалось найти колонку с текстом в CSV файле")
             
-            texts = []
-            for row in csv_reader:
-                if text_column in row and row[text_column].strip():
-                    texts.append(row[text_column].strip())
-            
-            return texts, text_column
+            return list(FileHandler._iter_csv_texts(csv_reader, text_column)), text_column
             
         except Exception as e:
             logger.error(f"Ошибка при обработке CSV файла: {e}")
             raise
     
+    @staticmethod
+    def process_csv_texts(file_content: bytes) -> List[str]:
+        """
+        Обработка CSV файла без имени колонки (для пула процессов)
+        """
+        texts, _ = FileHandler.process_csv_file(file_content)
+        return texts
+    
+    @staticmethod
+    def _iter_csv_texts(csv_reader: csv.DictReader, text_column: str) -> Iterator[str]:
+        """Построчная выдача непустых текстов из колонки CSV"""
+        for row in csv_reader:
+            value = row.get(text_column)
+            if value:
+                value = value.strip()
+                if value:
+                    yield value
+    
     @staticmethod
     def process_json_file(file_content: bytes) -> List[str]:
         """
@@ -97,23 +121,24 @@ class FileHandler:
         Каждый отзыв на новой строке
         """
         try:
-            content = file_content.decode('utf-8')
-            lines = content.split('\n')
-            
-            texts = []
-            for line in lines:
-                line = line.strip()
-                if line:
-                    texts.append(line)
-            
-            return texts
+            return list(FileHandler.iter_txt_texts(file_content))
             
         except Exception as e:
             logger.error(f"Ошибка при обработке TXT файла: {e}")
             raise
     
     @staticmethod
-    def validate_file_size(file_content: bytes, max_size_mb: int = 10) -> bool:
+    def iter_txt_texts(file_content: bytes) -> Iterator[str]:
+        """
+        Построчная выдача непустых строк TXT файла по мере декодирования
+        """
+        for line in FileHandler._text_stream(file_content, newline='\n'):
+            line = line.strip()
+            if line:
+                yield line
+    
+    @staticmethod
+    def validate_file_size(file_content: bytes, max_size_mb: int = MAX_FILE_SIZE_MB) -> bool:
         """
         Проверка размера файла
         """
@@ -1,171 +1,411 @@
-import requests
-import json
+import functools
+import logging
+import pytest
+import urllib3
+from urllib3.util.retry import Retry
+import orjson
 import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from jose import jwt
 
 # Базовый URL API
 BASE_URL = "http://localhost:8000"
 
+log = logging.getLogger("test_auth_api")
+
+# Кратковременные ошибки 5xx повторяются с экспоненциальной паузой, после исчерпания
+# попыток возвращается последний ответ, а не исключение
+RETRY = Retry(
+    total=2,
+    backoff_factor=0.1,
+    status_forcelist=[502, 503, 504],
+    allowed_methods=["GET", "POST"],
+    raise_on_status=False
+)
+
+# Таймауты соединения и чтения, чтобы зависший сервер не останавливал тесты
+TIMEOUT = urllib3.Timeout(connect=1.0, read=5.0)
+
+# Общий пул keep-alive соединений urllib3 для всех тестов
+HTTP = urllib3.PoolManager(
+    num_pools=1,
+    maxsize=20,
+    block=False,
+    retries=RETRY,
+    timeout=TIMEOUT,
+    headers={"User-Agent": "yandex-test/1.0", "Accept": "application/json"}
+)
+
+# Тела JSON-запросов сериализуются через orjson один раз и передаются как байты
+JSON_HEADERS = {"Content-Type": "application/json"}
+REGISTER_BODY = orjson.dumps({
+    "username": "testuser",
+    "email": "test@example.com",
+    "password": "testpass123"
+})
+# Форма входа передается как application/x-www-form-urlencoded
+LOGIN_FORM = {
+    "username": "testuser",
+    "password": "testpass123"
+}
+CLASSIFY_BODY = orjson.dumps({"text": "This is a test"})
+SINGLE_CLASSIFY_BODY = orjson.dumps({"text": "This is a wonderful product!"})
+BATCH_BODY = orjson.dumps({
+    "texts": [
+        "Great product!",
+        "Terrible service",
+        "It's okay"
+    ]
+})
+
+# Для потоковой классификации текстов больше, чем STREAM_CHUNK_SIZE (64) на сервере,
+# чтобы ответ собирался из нескольких частей
+STREAM_TEXTS = 80
+STREAM_BODY = orjson.dumps({"texts": [f"Review number {i}" for i in range(STREAM_TEXTS)]})
+
+# Токен сохраняется между запусками, чтобы не регистрироваться и не входить каждый раз
+TOKEN_CACHE_FILE = Path(".test_token.json")
+# Признак того, что тестовый пользователь уже зарегистрирован
+REGISTERED_FILE = Path(".registered")
+
+# Начальная и максимальная пауза между проверками готовности сервера, секунды
+READY_DELAY = 0.05
+READY_MAX_DELAY = 3.2
+
+# Число соединений, открываемых заранее: по размеру самой большой группы параллельных тестов
+WARM_CONNECTIONS = 3
+
+# Отдельная проверка эндпоинта /api/classify; по умолчанию достаточно пакетного запроса
+RUN_SINGLE_CLASSIFY = False
+
+def traced(name):
+    """Логирование времени выполнения теста (строка форматируется логгером отложенно)"""
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return test(*args, **kwargs)
+            finally:
+                log.info("%s: %.1f мс", name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
+
+def request(method, path, headers=None, **kwargs):
+    """
+    Запрос к API через общий пул. Заголовки запроса дополняют заголовки пула,
+    заголовок со значением None не отправляется
+    """
+    merged = {**HTTP.headers, **(headers or {})}
+    return HTTP.request(
+        method,
+        f"{BASE_URL}{path}",
+        headers={name: value for name, value in merged.items() if value is not None},
+        **kwargs
+    )
+
+def decode(response):
+    """Разбор JSON-ответа через orjson; пустое тело дает пустой словарь"""
+    return orjson.loads(response.data) if response.data else {}
+
+def load_cached_token():
+    """Чтение сохраненного токена; истекший или поврежденный токен не используется"""
+    try:
+        token = orjson.loads(TOKEN_CACHE_FILE.read_bytes())["access_token"]
+        # Подпись проверяет сервер, здесь нужен только срок действия
+        if jwt.get_unverified_claims(token).get("exp", 0) > time.time():
+            return token
+    except Exception:
+        pass
+    return None
+
+def save_cached_token(token):
+    """Сохранение токена для следующих запусков тестов"""
+    TOKEN_CACHE_FILE.write_bytes(orjson.dumps({"access_token": token}))
+
+def clear_cached_token():
+    """Удаление сохраненного токена"""
+    TOKEN_CACHE_FILE.unlink(missing_ok=True)
+
+@pytest.fixture(scope="session")
+def http():
+    """Общий пул соединений для тестов под pytest; без запущенного сервера тесты пропускаются"""
+    if not wait_ready():
+        pytest.skip("Сервер API недоступен")
+    yield HTTP
+    HTTP.clear()
+
+@pytest.fixture(scope="session")
+def token(http):
+    """Токен, полученный один раз на весь запуск тестов"""
+    token, _, _ = authenticate()
+    if token is None:
+        pytest.fail("Не удалось получить токен")
+    return token
+
+@pytest.mark.usefixtures("http")
+@traced("Register")
 def test_register():
     """Тест регистрации пользователя"""
-    try:
-        data = {
-            "username": "testuser",
-            "email": "test@example.com",
-            "password": "testpass123"
-        }
-        response = requests.post(f"{BASE_URL}/auth/register", json=data)
-        print(f"Register: {response.status_code}")
-        if response.status_code == 201:
-            print(f"User registered: {response.json()}")
-        else:
-            print(f"Error: {response.json()}")
-        return response.status_code == 201
-    except Exception as e:
-        print(f"Register failed: {e}")
-        return False
+    response = request("POST", "/auth/register", body=REGISTER_BODY, headers=JSON_HEADERS)
+    log.info("Register: %s", response.status)
+    body = decode(response)
+    if response.status == 201:
+        log.debug("User registered: %s", body)
+    elif response.status in (400, 409) and "already registered" in str(body.get("detail")):
+        # Повторная регистрация того же пользователя не считается ошибкой
+        log.info("User already registered: %s", body.get("detail"))
+    else:
+        log.error("Error: %s", body)
+        raise AssertionError(body)
+    REGISTERED_FILE.touch()
 
+@traced("Login")
+def login():
+    """Вход пользователя; возвращает токен или None"""
+    response = request("POST", "/auth/login", fields=LOGIN_FORM, encode_multipart=False)
+    log.info("Login: %s", response.status)
+    body = decode(response)
+    if response.status == 200:
+        log.info("Token received: %s...", body['access_token'][:20])
+        return body['access_token']
+    else:
+        log.error("Error: %s", body)
+        return None
+
+@pytest.mark.usefixtures("http")
 def test_login():
     """Тест входа пользователя"""
-    try:
-        data = {
-            "username": "testuser",
-            "password": "testpass123"
-        }
-        response = requests.post(f"{BASE_URL}/auth/login", data=data)
-        print(f"Login: {response.status_code}")
-        if response.status_code == 200:
-            token_data = response.json()
-            print(f"Token received: {token_data['access_token'][:20]}...")
-            return token_data['access_token']
-        else:
-            print(f"Error: {response.json()}")
-            return None
-    except Exception as e:
-        print(f"Login failed: {e}")
-        return None
+    assert login() is not None
 
-def test_me(token):
+@pytest.mark.usefixtures("token")
+@traced("Me")
+def test_me():
     """Тест получения информации о текущем пользователе"""
-    try:
-        headers = {"Authorization": f"Bearer {token}"}
-        response = requests.get(f"{BASE_URL}/auth/me", headers=headers)
-        print(f"Me: {response.status_code}")
-        print(f"User info: {response.json()}")
-        return response.status_code == 200
-    except Exception as e:
-        print(f"Me failed: {e}")
-        return False
+    response = request("GET", "/auth/me")
+    log.info("Me: %s", response.status)
+    body = decode(response)
+    log.debug("User info: %s", body)
+    assert response.status == 200, body
 
+@pytest.mark.usefixtures("http")
+@traced("Classify without token")
 def test_classify_without_token():
     """Тест классификации без токена (должен завершиться ошибкой)"""
-    try:
-        data = {"text": "This is a test"}
-        response = requests.post(f"{BASE_URL}/api/classify", json=data)
-        print(f"Classify without token: {response.status_code}")
-        if response.status_code == 403:
-            print("✅ Correctly rejected without token")
-            return True
-        else:
-            print("❌ Should have been rejected without token")
-            return False
-    except Exception as e:
-        print(f"Classify without token failed: {e}")
-        return False
+    # Токен пула отключается только для этого запроса; тело ответа не разбирается,
+    # так как проверяется только код статуса
+    response = request(
+        "POST",
+        "/api/classify",
+        body=CLASSIFY_BODY,
+        headers={**JSON_HEADERS, "Authorization": None},
+        preload_content=False
+    )
+    status_code = response.status
+    # Непрочитанное тело отбрасывается, соединение возвращается в пул
+    response.drain_conn()
+    response.release_conn()
+    log.info("Classify without token: %s", status_code)
+    if status_code == 403:
+        log.info("✅ Correctly rejected without token")
+    else:
+        log.error("❌ Should have been rejected without token")
+    assert status_code == 403
 
-def test_classify_with_token(token):
-    """Тест классификации с токеном"""
-    try:
-        headers = {"Authorization": f"Bearer {token}"}
-        data = {"text": "This is a wonderful product!"}
-        response = requests.post(f"{BASE_URL}/api/classify", json=data, headers=headers)
-        print(f"Classify with token: {response.status_code}")
-        print(f"Result: {response.json()}")
-        return response.status_code == 200
-    except Exception as e:
-        print(f"Classify with token failed: {e}")
-        return False
+@pytest.mark.usefixtures("token")
+@traced("Classify with token")
+def test_classify_with_token():
+    """Тест классификации одного текста с токеном"""
+    response = request("POST", "/api/classify", body=SINGLE_CLASSIFY_BODY, headers=JSON_HEADERS)
+    log.info("Classify with token: %s", response.status)
+    result = decode(response)
+    log.debug("Result: %s", result)
+    assert response.status == 200, result
+    assert "sentiment" in result, result
 
-def test_batch_classify_with_token(token):
+@pytest.mark.usefixtures("token")
+@traced("Batch classify")
+def test_batch_classify_with_token():
     """Тест пакетной классификации с токеном"""
-    try:
-        headers = {"Authorization": f"Bearer {token}"}
-        data = {
-            "texts": [
-                "Great product!",
-                "Terrible service",
-                "It's okay"
-            ]
-        }
-        response = requests.post(f"{BASE_URL}/api/classify-batch", json=data, headers=headers)
-        print(f"Batch classify with token: {response.status_code}")
-        result = response.json()
-        print(f"Total processed: {result.get('total')}")
-        return response.status_code == 200
-    except Exception as e:
-        print(f"Batch classify with token failed: {e}")
-        return False
+    response = request("POST", "/api/classify-batch", body=BATCH_BODY, headers=JSON_HEADERS)
+    log.info("Batch classify with token: %s", response.status)
+    result = decode(response)
+    log.info("Total processed: %s", result.get('total'))
+    assert response.status == 200, result
+
+@pytest.mark.usefixtures("token")
+@traced("Batch classify stream")
+def test_batch_classify_stream_with_token():
+    """Тест потоковой пакетной классификации с токеном (NDJSON, строка на каждый текст)"""
+    response = request("POST", "/api/classify-batch-stream", body=STREAM_BODY, headers=JSON_HEADERS)
+    log.info("Batch classify stream with token: %s", response.status)
+    assert response.status == 200, decode(response)
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    lines = [orjson.loads(line) for line in response.data.splitlines() if line]
+    log.info("Stream lines: %s", len(lines))
+    # Ошибка на сервере обозначается последней строкой {"error": ...}
+    assert not any("error" in line for line in lines), lines[-1]
+    assert len(lines) == STREAM_TEXTS
 
+@pytest.mark.usefixtures("token")
+@traced("Reload without admin")
+def test_reload_without_admin():
+    """Тест перезагрузки модели обычным пользователем (должна быть запрещена)"""
+    response = request("POST", "/api/admin/reload")
+    log.info("Reload without admin: %s", response.status)
+    body = decode(response)
+    # testuser не входит в ADMIN_USERNAMES, поэтому ожидается 403, а не перезагрузка модели
+    assert response.status == 403, body
+
+@pytest.mark.usefixtures("http")
+@traced("Health check")
 def test_health():
     """Тест проверки состояния API (должен работать без токена)"""
-    try:
-        response = requests.get(f"{BASE_URL}/api/health")
-        print(f"Health check: {response.status_code}")
-        print(f"Response: {response.json()}")
-        return response.status_code == 200
-    except Exception as e:
-        print(f"Health check failed: {e}")
-        return False
+    response = request("GET", "/api/health")
+    log.info("Health check: %s", response.status)
+    body = decode(response)
+    log.debug("Response: %s", body)
+    assert response.status == 200, body
 
+@pytest.mark.usefixtures("http")
+@traced("Model info")
 def test_model_info():
     """Тест получения информации о модели (должен работать без токена)"""
+    response = request("GET", "/api/model-info")
+    log.info("Model info: %s", response.status)
+    body = decode(response)
+    log.debug("Response: %s", body)
+    assert response.status == 200, body
+
+def wait_ready(timeout=15):
+    """Ожидание готовности сервера с экспоненциально растущей паузой между проверками"""
+    deadline = time.monotonic() + timeout
+    delay = READY_DELAY
+    while True:
+        try:
+            response = request("GET", "/api/health", timeout=1.0, retries=False)
+            # Пока модель загружается, сервер отвечает статусом warming
+            if response.status == 200 and decode(response).get("status") == "healthy":
+                warm_pool()
+                return True
+        except urllib3.exceptions.HTTPError:
+            pass
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, READY_MAX_DELAY)
+
+def idle_connections():
+    """Число открытых соединений, ожидающих в пуле"""
+    pool = HTTP.connection_from_url(BASE_URL).pool
+    return sum(conn is not None for conn in list(pool.queue))
+
+def warm_pool(connections=WARM_CONNECTIONS):
+    """Открытие keep-alive соединений заранее, чтобы первые тесты не тратили время на подключение"""
     try:
-        response = requests.get(f"{BASE_URL}/api/model-info")
-        print(f"Model info: {response.status_code}")
-        print(f"Response: {response.json()}")
-        return response.status_code == 200
+        with ThreadPoolExecutor(max_workers=connections) as pool:
+            list(pool.map(lambda _: request("GET", "/api/health", retries=False), range(connections)))
+    except urllib3.exceptions.HTTPError:
+        pass
+    # Подсчет соединений нужен только для отладочного лога
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("Соединений в пуле: %s", idle_connections())
+
+def check(test):
+    """Запуск теста вне pytest: True, если все проверки пройдены"""
+    try:
+        test()
+        return True
     except Exception as e:
-        print(f"Model info failed: {e}")
+        log.error("%s failed: %r", test.__name__, e)
         return False
 
+def run_concurrently(*tests):
+    """Параллельный запуск независимых тестов поверх общего пула соединений"""
+    with ThreadPoolExecutor(max_workers=len(tests)) as pool:
+        futures = [pool.submit(check, test) for test in tests]
+        return [future.result() for future in futures]
+
+def authenticate():
+    """
+    Получение токена: сохраненного с прошлого запуска или через регистрацию и вход.
+    Возвращает токен (или None), результат регистрации и результат проверки /auth/me
+    """
+    register_ok = True
+    me_ok = False
+    token = load_cached_token()
+    if token:
+        log.info("Используется сохраненный токен, регистрация и вход пропущены")
+        HTTP.headers["Authorization"] = f"Bearer {token}"
+        me_ok = check(test_me)
+        if not me_ok:
+            # Сервер отклонил сохраненный токен: удаляем его и входим заново
+            clear_cached_token()
+            token = None
+    
+    if not token:
+        registered = REGISTERED_FILE.exists()
+        if registered:
+            log.info("Пользователь уже зарегистрирован, регистрация пропущена")
+        else:
+            register_ok = check(test_register)
+        token = login()
+        if token is None and registered:
+            # Признак регистрации устарел (например, база данных пересоздана):
+            # удаляем его и один раз повторяем регистрацию и вход
+            log.info("Вход не удался, повторная регистрация")
+            REGISTERED_FILE.unlink(missing_ok=True)
+            register_ok = check(test_register)
+            token = login()
+        if token:
+            save_cached_token(token)
+            # Токен сохраняется в заголовках пула и передается во всех последующих запросах
+            HTTP.headers["Authorization"] = f"Bearer {token}"
+            me_ok = check(test_me)
+    return token, register_ok, me_ok
+
 def main():
     """Основная функция тестирования"""
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        run_tests()
+    finally:
+        HTTP.clear()
+
+def run_tests():
+    """Запуск тестов без pytest с выводом итогов"""
     print("Начало тестирования API с аутентификацией...")
     print("-" * 50)
     
     # Ждем запуска сервера
     print("Ожидание запуска сервера...")
-    time.sleep(5)
+    if not wait_ready():
+        print("❌ Сервер не готов, тестирование прервано")
+        return
     
     # Тесты без аутентификации
     print("\n--- Тесты без аутентификации ---")
-    health_ok = test_health()
-    model_info_ok = test_model_info()
-    classify_no_token_ok = test_classify_without_token()
+    health_ok, model_info_ok, classify_no_token_ok = run_concurrently(
+        test_health, test_model_info, test_classify_without_token
+    )
     
     # Регистрация и вход
     print("\n--- Тесты аутентификации ---")
-    register_ok = test_register()
-    token = test_login()
+    token, register_ok, me_ok = authenticate()
     
     if token:
-        me_ok = test_me(token)
-        
         # Тесты с аутентификацией
         print("\n--- Тесты с аутентификацией ---")
-        classify_ok = test_classify_with_token(token)
-        batch_ok = test_batch_classify_with_token(token)
-        
-        # Итоги
-        print("\n" + "=" * 50)
-        print("Итоги тестирования:")
-        print(f"Health Check: {'✅ Успешно' if health_ok else '❌ Ошибка'}")
-        print(f"Model Info: {'✅ Успешно' if model_info_ok else '❌ Ошибка'}")
-        print(f"Classify without token: {'✅ Правильно отклонено' if classify_no_token_ok else '❌ Ошибка'}")
-        print(f"Register: {'✅ Успешно' if register_ok else '❌ Ошибка'}")
-        print(f"Login: {'✅ Успешно' if token else '❌ Ошибка'}")
-        print(f"Get User Info: {'✅ Успешно' if me_ok else '❌ Ошибка'}")
-        print(f"Classify with token: {'✅ Успешно' if classify_ok else '❌ Ошибка'}")
-        print(f"Batch Classify: {'✅ Успешно' if batch_ok else '❌ Ошибка'}")
+        auth_tests = [
+            test_batch_classify_with_token,
+            test_batch_classify_stream_with_token,
+            test_reload_without_admin
+        ]
+        if RUN_SINGLE_CLASSIFY:
+            auth_tests.append(test_classify_with_token)
+        batch_ok, stream_ok, reload_ok, *single_ok = run_concurrently(*auth_tests)
         
         all_passed = all([
             health_ok, 
@@ -174,15 +414,33 @@ def main():
             register_ok, 
             bool(token), 
             me_ok, 
-            classify_ok, 
-            batch_ok
+            batch_ok,
+            stream_ok,
+            reload_ok,
+            *single_ok
         ])
         
-        print(f"\nОбщий результат: {'✅ Все тесты пройдены' if all_passed else '❌ Некоторые тесты не пройдены'}")
-        
+        # Итоги собираются в одну строку и выводятся одним вызовом print
+        summary = [
+            "\n" + "=" * 50,
+            "Итоги тестирования:",
+            f"Health Check: {'✅ Успешно' if health_ok else '❌ Ошибка'}",
+            f"Model Info: {'✅ Успешно' if model_info_ok else '❌ Ошибка'}",
+            f"Classify without token: {'✅ Правильно отклонено' if classify_no_token_ok else '❌ Ошибка'}",
+            f"Register: {'✅ Успешно' if register_ok else '❌ Ошибка'}",
+            f"Login: {'✅ Успешно' if token else '❌ Ошибка'}",
+            f"Get User Info: {'✅ Успешно' if me_ok else '❌ Ошибка'}",
+        ]
+        if RUN_SINGLE_CLASSIFY:
+            summary.append(f"Classify with token: {'✅ Успешно' if all(single_ok) else '❌ Ошибка'}")
+        summary.append(f"Batch Classify: {'✅ Успешно' if batch_ok else '❌ Ошибка'}")
+        summary.append(f"Batch Classify Stream: {'✅ Успешно' if stream_ok else '❌ Ошибка'}")
+        summary.append(f"Reload without admin: {'✅ Правильно отклонено' if reload_ok else '❌ Ошибка'}")
+        summary.append(f"\nОбщий результат: {'✅ Все тесты пройдены' if all_passed else '❌ Некоторые тесты не пройдены'}")
         if all_passed:
-            print("\n🎉 API с аутентификацией готов к использованию!")
-            print(f"Документация API: {BASE_URL}/docs")
+            summary.append("\n🎉 API с аутентификацией готов к использованию!")
+            summary.append(f"Документация API: {BASE_URL}/docs")
+        print("\n".join(summary))
     else:
         print("\n❌ Не удалось получить токен, тесты с аутентификацией пропущены")
 